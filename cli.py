@@ -1,23 +1,43 @@
-import traceback
+import collections.abc
+import linecache
 import re
+import sys
 from types import SimpleNamespace
 from typing import Any, Callable, List, Literal, Optional, Union
 
-def typecheck(val, ty):
-    if not isinstance(val, ty):
-        stack = traceback.extract_stack()
-        try:
-            _, _, _, code = stack[-2]
-            pattern_match = re.compile(r'\((.*?)\).*$').search(code)
-            if pattern_match is not None:
-                vars_name = pattern_match.groups()[0]
-            else:
+_TYPECHECK_VARNAME_RE = re.compile(r'typecheck\((.*?),')
+
+# plain type-tuples keep isinstance on its fast path, unlike typing.Optional/Union
+_OPT_STR = (str, type(None))
+
+def _type_name(ty) -> str:
+    # spell type-tuples the way they'd be annotated, e.g. `str | None`
+    if isinstance(ty, tuple):
+        return " | ".join("None" if t is type(None) else t.__name__ for t in ty)
+    return str(ty)
+
+# typecheck is a developer aid only, so it's compiled out under `python -O`
+if __debug__:
+    def typecheck(val, ty):
+        if not isinstance(val, ty):
+            try:
+                frame = sys._getframe(1)
+                code = linecache.getline(frame.f_code.co_filename, frame.f_lineno).strip()
+                pattern_match = _TYPECHECK_VARNAME_RE.search(code)
+                if pattern_match is not None:
+                    vars_name = pattern_match.groups()[0]
+                else:
+                    vars_name = "<unknown>"
+            except ValueError:
                 vars_name = "<unknown>"
-        except ValueError:
-            vars_name = "<unknown>"
-        raise TypeError(f"{vars_name} (of type {str(type(val))!r}) must be of type {str(ty)!r}!!")
+            raise TypeError(f"{vars_name} (of type {str(type(val))!r}) must be of type {_type_name(ty)!r}!!")
+else:
+    def typecheck(val, ty):
+        pass
 
 class Command:
+    __slots__ = ('_name', '_description', '_short', '_long', '_disable_name', '_flags', '_params', '_names')
+
     _name: str
     _description: Optional[str]
     _short: List[str]
@@ -25,21 +45,23 @@ class Command:
     _disable_name: bool
     _flags: List['Flag']
     _params: List['Param']
+    _names: set[str]
 
     def __init__(self, name: str, description: Optional[str] = None):
         typecheck(name, str)
-        typecheck(description, Optional[str])
+        typecheck(description, _OPT_STR)
 
         if not name.strip():
             raise ValueError("name must be a non-empty string!")
 
-        self._name = name
+        self._name = sys.intern(name)
         self._description = description
         self._short = list() 
         self._long = list() 
         self._disable_name = False
         self._flags = list()
         self._params = list()
+        self._names = set()
 
     def short(self, short: str) -> 'Command':
         typecheck(short, str)
@@ -50,7 +72,7 @@ class Command:
             raise ValueError(f"command {self.name()}: short-flag must start with '-'")
         if len(short) != 2:
             raise ValueError(f"command {self.name()}: short-flags must be only 2 characters long!")
-        self._short.append(short)
+        self._short.append(sys.intern(short))
         return self
 
     def long(self, long: str) -> 'Command':
@@ -58,18 +80,14 @@ class Command:
         long = long.strip()
         if not long.startswith("--"):
             raise ValueError(f"command {self.name()}: long-flag must start with '--'")
-        self._long.append(long)
+        self._long.append(sys.intern(long))
         return self
 
     def arg(self, arg: Union['Flag', 'Param']) -> 'Command':
-        typecheck(arg, Union[Flag, Param])
+        typecheck(arg, (Flag, Param))
 
-        for flag in self._flags:
-            if flag.name() == arg._name:
-                raise ValueError(f"command {self._name}: item with name {arg._name!r} already exists")
-        for param in self._params:
-            if param.name() == arg._name:
-                raise ValueError(f"command {self._name}: item with name {arg._name!r} already exists")
+        if arg._name in self._names:
+            raise ValueError(f"command {self._name}: item with name {arg._name!r} already exists")
 
         if isinstance(arg, Flag):
             if len(arg.get_short()) + len(arg.get_long()) == 0:
@@ -79,6 +97,7 @@ class Command:
             if not arg.is_optional() and len(self._params) > 0 and self._params[-1].is_optional():
                 raise ValueError(f"command {self.name()}: optional parameters must appear last")
             self._params.append(arg)
+        self._names.add(arg._name)
         return self
 
     def name(self) -> str:
@@ -104,6 +123,9 @@ class Command:
 
 
 class Flag:
+    __slots__ = ('_name', '_description', '_required', '_short', '_long', '_parser', '_kind', '_handler',
+                 '_default')
+
     _name: str
     _description: Optional[str]
     _required: bool
@@ -111,23 +133,25 @@ class Flag:
     _long: List[str]
     _parser: Optional[Callable[[str], Any]]
     _kind: Literal["value", "count", "present"]
+    _handler: Callable[['_ArgParse', 'Flag', Optional[str], str], None]
     _default: Any
 
     def __init__(self, name: str, description: Optional[str] = None):
         typecheck(name, str)
-        typecheck(description, Optional[str])
+        typecheck(description, _OPT_STR)
 
         name = name.strip()
         if not name:
             raise ValueError("name must be a non-empty string!")
 
-        self._name = name
+        self._name = sys.intern(name)
         self._description = description
         self._required = False
         self._short = list()
         self._long = list()
         self._parser = None
         self._kind = "present"
+        self._handler = _handle_present
         self._default = None
 
     def short(self, name: str) -> 'Flag':
@@ -139,7 +163,7 @@ class Flag:
             raise ValueError(f"command {self.name()}: short-flag must start with '-'")
         if len(name) != 2:
             raise ValueError(f"command {self.name()}: short-flags must be only 2 characters long!")
-        self._short.append(name)
+        self._short.append(sys.intern(name))
         return self
 
     def long(self, name: str) -> 'Flag':
@@ -149,7 +173,7 @@ class Flag:
             raise ValueError(f"command {self.name()}: long-flag must start with '--'")
         if len(name) == 2:
             raise ValueError(f"command {self.name()}: long-flag must not be empty")
-        self._long.append(name)
+        self._long.append(sys.intern(name))
         return self
 
     def optional(self) -> 'Flag':
@@ -157,7 +181,7 @@ class Flag:
         return self
 
     def parser(self, parser: Callable[[str], Any]) -> 'Flag':
-        typecheck(parser, Callable)
+        typecheck(parser, collections.abc.Callable)
         if self._kind != "value":
             raise ValueError(f"flag {self._name}: only 'valued' flags can set a value-parser")
         self._parser = parser
@@ -165,10 +189,12 @@ class Flag:
 
     def valued(self) -> 'Flag':
         self._kind = "value"
+        self._handler = _handle_value
         return self
 
     def count(self) -> 'Flag':
         self._kind = "count"
+        self._handler = _handle_count
         return self
 
     def default(self, val) -> 'Flag':
@@ -204,6 +230,8 @@ class Flag:
 
 
 class Param:
+    __slots__ = ('_name', '_description', '_required', '_parser', '_default')
+
     _name: str
     _description: Optional[str]
     _required: bool
@@ -212,13 +240,13 @@ class Param:
 
     def __init__(self, name: str, description: Optional[str] = None):
         typecheck(name, str)
-        typecheck(description, Optional[str])
+        typecheck(description, _OPT_STR)
 
         name = name.strip()
         if not name:
             raise ValueError("name must be a non-empty string!")
 
-        self._name = name
+        self._name = sys.intern(name)
         self._description = description
         self._required = True
         self._parser = None
@@ -229,7 +257,7 @@ class Param:
         return self
 
     def parser(self, parser: Callable[[str], Any]) -> 'Param':
-        typecheck(parser, Callable)
+        typecheck(parser, collections.abc.Callable)
         self._parser = parser
         return self
 
@@ -254,6 +282,8 @@ class Param:
 
 
 class Args:
+    __slots__ = ('_command', '_values')
+
     _command: str
     _values: SimpleNamespace
 
@@ -269,119 +299,128 @@ class Args:
     def values(self) -> SimpleNamespace:
         return self._values
 
+class _ArgsNamespace(SimpleNamespace):
+    __slots__ = ('_defaults',)
+
+    def __init__(self, defaults: dict[str, Any], values: dict[str, Any]) -> None:
+        super().__init__(**values)
+        self._defaults = defaults
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes that weren't set while parsing
+        if name != '_defaults' and name in self._defaults:
+            return self._defaults[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def __reduce__(self):
+        return (type(self), (self._defaults, vars(self)))
+
+    def _merged(self) -> dict[str, Any]:
+        # parsed values first, then defaults, in the order eager filling produced
+        merged = dict(vars(self))
+        for name, default in self._defaults.items():
+            merged.setdefault(name, default)
+        return merged
+
+    def __repr__(self) -> str:
+        return repr(SimpleNamespace(**self._merged()))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _ArgsNamespace):
+            return self._merged() == other._merged()
+        if isinstance(other, SimpleNamespace):
+            return self._merged() == vars(other)
+        return NotImplemented
+
+    def __ne__(self, other: object) -> bool:
+        # SimpleNamespace's own != would only compare the parsed values
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+# flag-kind handlers, picked once by Flag.valued()/count() and called per occurrence
+# with the inline `--flag=value` value (or None) and the flag as it was typed
+def _handle_value(parser: '_ArgParse', flag: Flag, value: Optional[str], flag_token: str):
+    if value is None:
+        if parser.idx >= len(parser.argv):
+            raise ValueError(f"{parser.command.name()}: expected positional argument from flag '{flag_token}'")
+        value = parser.argv[parser.idx]
+        parser.idx += 1
+
+    value_parser = flag._parser
+    if value_parser:
+        try:
+            value = value_parser(value)
+        except (InterruptedError, KeyboardInterrupt):
+            raise
+        except Exception as err:
+            raise ValueError(f"{parser.command.name()}: invalid argument from flag '{flag_token}' -- {err}") from err
+
+    existing = parser.values.get(flag._name)
+    if existing is not None:
+        existing.append(value)
+    else:
+        parser.values[flag._name] = [value]
+
+def _handle_count(parser: '_ArgParse', flag: Flag, value: Optional[str], flag_token: str):
+    if value is not None:
+        raise ValueError(f"{parser.command.name()}: flag {flag_token} was provided a value but is not a valued-flag!")
+    parser.values[flag._name] = parser.values.get(flag._name, 0) + 1
+
+def _handle_present(parser: '_ArgParse', flag: Flag, value: Optional[str], flag_token: str):
+    if value is not None:
+        raise ValueError(f"{parser.command.name()}: flag {flag_token} was provided a value but is not a valued-flag!")
+    if flag._name in parser.values:
+        raise ValueError(f"{parser.command.name()}: flag '{flag_token}' specified more than once")
+    parser.values[flag._name] = True
+
 class _ArgParse:
     commands: List[Command]
     argv: List[str]
     command: Command
     idx: int
     param_idx: int
-    values: SimpleNamespace
+    values: dict[str, Any]
     required_flags: set[str]
+    long_flags: dict[str, Flag]
+    short_flags: dict[str, Flag]
 
     def _find_long_flag(self, val: str) -> Optional[Flag]:
-        for flag in self.command.flags():
-            for flag_long in flag.get_long():
-                if val == flag_long:
-                    return flag
-        return None
+        return self.long_flags.get(val)
 
     def _parse_long(
             self,
             arg_value: str,
     ):
-        parts = arg_value.split("=", 1)
-        flag_name = arg_value if len(parts) == 1 else parts[0]
+        flag_name, sep, value = arg_value.partition("=")
         flag = self._find_long_flag(flag_name)
         if not flag:
-            raise ValueError(f"{self.command.name()}: unknown flag --{flag_name}")
+            raise ValueError(f"{self.command.name()}: unknown flag '{flag_name}'")
 
         # required-value tracking
-        if flag.name() in self.required_flags:
-            self.required_flags.remove(flag.name())
+        self.required_flags.discard(flag._name)
 
         # value-handling
-        if len(parts) == 2 and flag.kind() != "value":
-            raise ValueError(f"{self.command.name()}: flag --{flag_name} was provided a value but is not a valued-flag!")
-
-        if flag.kind() == "value":
-            if len(parts) != 2:
-                if self.idx >= len(self.argv):
-                    raise ValueError(f"{self.command.name()}: expected positional argument from flag '--{flag_name}'")
-                value = self.argv[self.idx]
-                self.idx += 1
-            else:
-                value = parts[1]
-            parser = flag.get_parser()
-            if parser:
-                try:
-                    value = parser(value)
-                except (InterruptedError, KeyboardInterrupt) as err:
-                    raise err
-                except Exception as err:
-                    raise ValueError(f"{self.command.name()}: invalid argument from flag '--{flag_name}' -- {err}")
-
-            if hasattr(self.values, flag.name()):
-                getattr(self.values, flag.name()).append(value)
-            else:
-                setattr(self.values, flag.name(), [value])
-        elif flag.kind() == "count":
-            count: int = getattr(self.values, flag.name(), 0) + 1
-            setattr(self.values, flag.name(), count)
-        elif flag.kind() == "present":
-            if hasattr(self.values, flag.name()):
-                raise ValueError(f"{self.command.name()}: flag '{flag.name()}' specified more than once")
-            setattr(self.values, flag.name(), True)
-        else:
-            assert False, "unreachable"
+        flag._handler(self, flag, value if sep else None, flag_name)
 
     def _find_short_flag(self, flag_name: str) -> Optional[Flag]:
-        for flag in self.command.flags():
-            for short_flag in flag.get_short():
-                if short_flag == flag_name:
-                    return flag
-        return None
+        return self.short_flags.get(flag_name)
 
     def _parse_short(self, arg_value: str):
-        flag_names = list('-' + c for c in arg_value[1:])
-        if len(flag_names) == 0:
+        if len(arg_value) == 1:
             raise ValueError("invalid argument '-'")
 
-        for flag_name in flag_names:
+        for c in arg_value[1:]:
+            flag_name = '-' + c
             flag = self._find_short_flag(flag_name)
             if not flag:
-                raise ValueError(f"{self.command.name()}: unknown flag '-{flag_name}'")
+                raise ValueError(f"{self.command.name()}: unknown flag '{flag_name}'")
 
             # required-value tracking
-            if flag.name() in self.required_flags:
-                self.required_flags.remove(flag.name())
+            self.required_flags.discard(flag._name)
 
             # value-handling
-            if flag.kind() == "value":
-                parser = flag.get_parser()
-                if self.idx >= len(self.argv):
-                    raise ValueError(f"{self.command.name()}: expected positional argument from flag '-{flag_name}'")
-                value = self.argv[self.idx]
-                self.idx += 1
-                if parser:
-                    try:
-                        value = parser(value)
-                    except (InterruptedError, KeyboardInterrupt) as err:
-                        raise err
-                    except Exception as err:
-                        raise ValueError(f"{self.command.name()}: invalid argument from flag '-{flag_name}' -- {err}")
-                if hasattr(self.values, flag.name()):
-                    getattr(self.values, flag.name()).append(value)
-                else:
-                    setattr(self.values, flag.name(), [value])
-            elif flag.kind() == "count":
-                count: int = getattr(self.values, flag.name(), 0) + 1
-                setattr(self.values, flag.name(), count)
-            elif flag.kind() == "present":
-                if hasattr(self.values, flag.name()):
-                    raise ValueError(f"{self.command.name()}: flag '-{flag_name}' specified more than once")
-                setattr(self.values, flag.name(), True)
-            else:
-                assert False, "unreachable"
+            flag._handler(self, flag, None, flag_name)
+
     def _find_command(self, command_name: str) -> Optional[Command]:
         return _find_command(self.commands, command_name)
 
@@ -407,7 +446,6 @@ def _find_command(commands: List[Command], command_name: str) -> Optional[Comman
 
 def parse_args(commands: List[Command], argv: Optional[List[str]] = None) -> Args:
     if argv is None:
-        import sys
         argv = sys.argv[1:]
 
     if len(argv) == 0:
@@ -421,11 +459,22 @@ def parse_args(commands: List[Command], argv: Optional[List[str]] = None) -> Arg
     if not command:
         raise ValueError(f"unknown command: {argv[0]!r}")
     parser.command = command
-    parser.values = SimpleNamespace()
+    params = command.params()
+    flags = command.flags()
+    # built per parse, so names added to a flag after Command.arg are still seen
+    parser.long_flags = dict()
+    parser.short_flags = dict()
+    for flag in flags:
+        # setdefault keeps the first flag declared with a given name
+        for long in flag.get_long():
+            parser.long_flags.setdefault(long, flag)
+        for short in flag.get_short():
+            parser.short_flags.setdefault(short, flag)
+    parser.values = dict()
     parser.param_idx = 0
     parser.idx = 1
     parser.required_flags = set()
-    for flag in command.flags():
+    for flag in flags:
         if flag.is_required():
             parser.required_flags.add(flag.name())
 
@@ -438,9 +487,9 @@ def parse_args(commands: List[Command], argv: Optional[List[str]] = None) -> Arg
         elif arg_value.startswith("-"):
             parser._parse_short(arg_value)
         else:
-            if parser.param_idx >= len(command.params()):
+            if parser.param_idx >= len(params):
                 raise ValueError(f"{command.name()}: unexpected argument {arg_value!r}")
-            param = command.params()[parser.param_idx]
+            param = params[parser.param_idx]
             parser.param_idx += 1
 
             value = arg_value
@@ -452,27 +501,20 @@ def parse_args(commands: List[Command], argv: Optional[List[str]] = None) -> Arg
                     raise err
                 except Exception as err:
                     raise ValueError(f"{command.name()}: invalid argument {arg_value!r} -- {err}")
-            setattr(parser.values, param.name(), value)
+            parser.values[param.name()] = value
 
     # required-value checking
-    if parser.param_idx < len(command.params()) and not command.params()[parser.param_idx].is_optional():
-        raise ValueError(f"missing required argument {command.params()[parser.param_idx].name()!r}")
+    if parser.param_idx < len(params) and not params[parser.param_idx].is_optional():
+        raise ValueError(f"missing required argument {params[parser.param_idx].name()!r}")
 
     if len(parser.required_flags) > 0:
         raise ValueError(f"required flags are missing: {', '.join(repr(i) for i in parser.required_flags)}")
    
-    # default-values
-    for param in command.params():
-        if param.is_optional():
-            if not hasattr(parser.values, param.name()):
-                setattr(parser.values, param.name(), param.get_default())
-    for flag in command.flags():
-        if flag.is_optional():
-            if not hasattr(parser.values, flag.name()):
-                setattr(parser.values, flag.name(), flag.get_default())
-
-
-    out = Args(command.name(), parser.values)
+    # default-values, resolved on first read of a missing attribute
+    defaults = {param._name: param._default for param in params if param.is_optional()}
+    defaults.update({flag._name: flag._default for flag in flags if flag.is_optional()})
+
+    out = Args(command.name(), _ArgsNamespace(defaults, parser.values))
     return out
 
 def print_help(
@@ -482,92 +524,66 @@ def print_help(
     file=None,
     argv: Optional[List[str]] = None
 ):
-    print(file=file)
-    print(f"{name} - {description}", file=file)
-    print(file=file)
+    out: list[str] = list()
+    out.append("")
+    out.append(f"{name} - {description}")
+    out.append("")
 
     if argv is None:
-        import sys
         argv = sys.argv[1:]
 
     command: Optional[Command] = None
     if len(argv) > 0:
         command = _find_command(commands, argv[0])
     if command is not None:
-        usage_items = []
-        for param in command.params():
-            usage_items.append(f"<{param.name()}>"
-                               if not param.is_optional()
-                               else f"[{param.name()}]")
-        for flag in command.flags():
-            parts = []
-            for short in flag.get_short():
-                parts.append(short)
-            for long in flag.get_long():
-                parts.append(long)
-            item = "|".join(parts)
-            if flag.kind() == "value":
-                item += " ..."
-            if flag.is_optional():
-                item = f"[{item}]"
-            else:
-                item = f"<{item}>"
-            usage_items.append(item)
-
-        print(f"Usage: {name} {argv[0]} {' '.join(usage_items)}", file=file)
-        print(file=file)
-        print(command.description(), file=file)
-        print(file=file)
-        print("Arguments:", file=file)
-        items: list[str] = list()
-        max_width = 0
+        # (item, description, default) rows, built alongside the usage line
+        usage_items: list[str] = list()
+        param_rows: list[tuple[str, str, str]] = list()
         for param in command.params():
             if not param.is_optional():
                 item = f"<{param.name()}>"
             else:
                 item = f"[{param.name()}]"
-            items.append(item)
-            max_width = max(max_width, len(item))
-        for item, param in zip(items, command.params()):
+            usage_items.append(item)
             default = param.get_default()
-            if default:
-                default = f"(default {default!r})"
-            else:
-                default = ""
-            print(f"  {item:<{max_width}} {param.description() or ''} {default}", file=file)
+            param_rows.append((item, param.description() or '', f"(default {default!r})" if default else ""))
 
-        print(file=file)
-        print("Flags:", file=file)
-        flags: list[str] = list()
-        max_width = 0
+        flag_rows: list[tuple[str, str, str]] = list()
         for flag in command.flags():
-            parts = []
-            for short in flag.get_short():
-                parts.append(short)
-            for long in flag.get_long():
-                parts.append(long)
+            parts = flag.get_short() + flag.get_long()
+            usage = "|".join(parts)
+            if flag.kind() == "value":
+                usage += " ..."
             item = ", ".join(parts)
             if flag.is_optional():
+                usage = f"[{usage}]"
                 item = f"[{item}]"
             else:
+                usage = f"<{usage}>"
                 item = f"<{item}>"
-            max_width = max(max_width, len(item))
-            flags.append(item)
-        for name, flag in zip(flags, command.flags()):
+            usage_items.append(usage)
             default = flag.get_default()
-            if default:
-                default = "(default {default!r})"
-            else:
-                default = ""
-            print(f"  {name:<{max_width}} {flag.description() or ''} {default}", file=file)
-        else:
-            default = ""
+            flag_rows.append((item, flag.description() or '', f"(default {default!r})" if default else ""))
+
+        out.append(f"Usage: {name} {argv[0]} {' '.join(usage_items)}")
+        out.append("")
+        out.append(str(command.description()))
+        out.append("")
+        out.append("Arguments:")
+        max_width = max((len(item) for item, _, _ in param_rows), default=0)
+        for item, desc, default in param_rows:
+            out.append(f"  {item:<{max_width}} {desc} {default}")
+
+        out.append("")
+        out.append("Flags:")
+        max_width = max((len(item) for item, _, _ in flag_rows), default=0)
+        for item, desc, default in flag_rows:
+            out.append(f"  {item:<{max_width}} {desc} {default}")
     else:
-        print(f"Usage: {name} <command> [args...] [flags...]", file=file)
-        print(file=file)
-        print(f"Commands:", file=file)
+        out.append(f"Usage: {name} <command> [args...] [flags...]")
+        out.append("")
+        out.append(f"Commands:")
         names = []
-        max_width = 0
         for command in commands:
             parts: list[str] = []
             if not command.disable_name():
@@ -577,9 +593,9 @@ def print_help(
             for long in command.get_long():
                 parts.append(long)
             command_name: str = ", ".join(parts)
-            max_width = max(max_width, len(command_name))
             names.append(command_name)
+        max_width = max(map(len, names), default=0)
         for cmd_name, cmd in zip(names, commands):
-            print(f"  {cmd_name:<{max_width}} {cmd.description() or ''}", file=file)
-    print(file=file)
-
+            out.append(f"  {cmd_name:<{max_width}} {cmd.description() or ''}")
+    out.append("")
+    (file or sys.stdout).write("\n".join(out) + "\n")
@@ -1,11 +1,15 @@
+import math
 import sys
 from types import SimpleNamespace
-from PIL import Image, ImageEnhance
 from cli import Command, Flag, Param, parse_args, print_help
 
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
+def open_image(path: str):
+    from PIL import Image
+    return Image.open(path)
+
 def cmd_help(input):
     pass
 
@@ -13,8 +17,21 @@ def cmd_brightness(input: SimpleNamespace) -> int:
     image = input.image
     brightness = input.brightness
 
-    enhancer = ImageEnhance.Brightness(image)
-    result = enhancer.enhance(brightness)
+    # scale every band through one lookup-table pass instead of blending
+    # against a black image, leaving alpha untouched like ImageEnhance does.
+    # modes ImageEnhance can't blend (palette, bilevel, LAB, 32-bit, ...) are
+    # converted first, keeping any transparency as a real alpha band
+    if image.mode not in ("L", "LA", "La", "RGB", "RGBA", "RGBa", "RGBX", "CMYK", "YCbCr", "HSV"):
+        has_alpha = image.mode.endswith("A") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    # any factor past 255 saturates every non-zero level, so clamp to keep the
+    # table finite (nan goes to black, as with ImageEnhance)
+    brightness = 0.0 if math.isnan(brightness) else min(max(brightness, 0.0), 255.0)
+    scale = [min(255, int(i * brightness)) for i in range(256)]
+    lut: list[int] = []
+    for band in image.getbands():
+        lut += range(256) if band == "A" else scale
+    result = image.point(lut)
 
     if input.output:
         result.save(input.output[0])
@@ -30,7 +47,7 @@ if __name__ == '__main__':
             .long("--help")
             .arg(Param("command").optional()),
         Command("brightness", "adjust the brightness of an image")
-            .arg(Param("image", "the file to open").parser(Image.open))
+            .arg(Param("image", "the file to open").parser(open_image))
             .arg(Param("brightness", "the new brightness value, (0.0..1.0 is the standard range)")
                  .parser(float))
             .arg(Flag("output", "the output file path")